@@ -7,6 +7,8 @@ Sends daily reversal signals, Nifty/SmallCap summary & news headlines.
 import asyncio
 import logging
 import os
+import signal
+from concurrent.futures import ThreadPoolExecutor
 from datetime import time as dtime
 
 # Ensure runtime dirs exist before logging to file
@@ -14,7 +16,13 @@ os.makedirs("logs", exist_ok=True)
 os.makedirs("data", exist_ok=True)
 
 from telegram import Bot
-from telegram.ext import Application, CommandHandler, ContextTypes, JobQueue
+from telegram.ext import (
+    AIORateLimiter,
+    Application,
+    CommandHandler,
+    ContextTypes,
+    JobQueue,
+)
 
 from config.settings import (
     TELEGRAM_TOKEN,
@@ -23,6 +31,7 @@ from config.settings import (
     TRACKED_STOCKS,
     SCHEDULER_ONLY,
     LOG_HTTP,
+    IO_THREAD_WORKERS,
 )
 from modules.market_data import MarketDataFetcher
 from modules.technical import TechnicalAnalyzer
@@ -41,37 +50,85 @@ logging.basicConfig(
 logger = logging.getLogger("StockBot")
 
 # Log NSE HTTP requests (URL + status) when LOG_HTTP=1
-if LOG_HTTP:
-    logging.getLogger("urllib3").setLevel(logging.INFO)
+logging.getLogger("httpx").setLevel(logging.INFO if LOG_HTTP else logging.WARNING)
 
 
 # ──────────────────────────────────────────────
 # Core report builder
 # ──────────────────────────────────────────────
 
-async def build_and_send_report(bot: Bot):
+def build_services() -> dict:
+    """Create the fetchers/formatters shared across reports and commands.
+
+    Built once per process so NSEDataFetcher's HTTP session (and its
+    keep-alive connections) survives between runs.
+    """
+    return {
+        "fetcher":   MarketDataFetcher(),
+        "analyzer":  TechnicalAnalyzer(),
+        "news":      NewsFetcher(),
+        "formatter": MessageFormatter(),
+        "health":    HealthMonitor(),
+    }
+
+
+def build_rate_limiter() -> AIORateLimiter:
+    """Throttle sends only when Telegram's flood limits would be exceeded
+    (30 msg/s overall, 20 msg/min per group), with some headroom."""
+    return AIORateLimiter(
+        overall_max_rate=25,
+        overall_time_period=1,
+        group_max_rate=18,
+        group_time_period=60,
+    )
+
+
+def install_io_executor() -> ThreadPoolExecutor:
+    """Make a small dedicated pool the running loop's default executor.
+
+    Blocking work (RSS parsing, health.json writes) goes through
+    run_in_executor/to_thread; a bounded pool avoids thread thrash on bursts.
+    """
+    executor = ThreadPoolExecutor(max_workers=IO_THREAD_WORKERS, thread_name_prefix="io")
+    asyncio.get_running_loop().set_default_executor(executor)
+    return executor
+
+
+async def close_services(services: dict):
+    """Release network resources held by the shared services."""
+    await services["fetcher"].aclose()
+
+
+async def build_and_send_report(bot: Bot, services: dict):
     """Fetch all data, analyse, format, send."""
     logger.info("📊 Starting daily report build...")
 
-    fetcher  = MarketDataFetcher()
-    analyzer = TechnicalAnalyzer()
-    news_fetcher = NewsFetcher()
-    formatter    = MessageFormatter()
-    health       = HealthMonitor()
+    fetcher      = services["fetcher"]
+    analyzer     = services["analyzer"]
+    news_fetcher = services["news"]
+    formatter    = services["formatter"]
+    health       = services["health"]
 
     try:
-        # 1. Index summary
-        indices = await fetcher.get_index_summary()
-
-        # 2. Stock signals
-        stock_signals = []
-        for ticker in TRACKED_STOCKS:
-            data   = await fetcher.get_ohlcv(ticker)
-            signal = analyzer.analyse(ticker, data)
-            stock_signals.append(signal)
-
-        # 3. News headlines
-        headlines = await news_fetcher.get_headlines(TRACKED_STOCKS)
+        # 1–3. Index summary, per-stock OHLCV and news headlines, fetched concurrently
+        indices, headlines, frames = await asyncio.gather(
+            fetcher.get_index_summary(),
+            news_fetcher.get_headlines_cached(TRACKED_STOCKS),
+            fetcher.get_ohlcv_many(TRACKED_STOCKS),
+            return_exceptions=True,
+        )
+        for result in (indices, frames):
+            if isinstance(result, Exception):
+                raise result
+        if isinstance(headlines, Exception):
+            logger.error("News fetch failed: %s", headlines)
+            headlines = {}
+
+        # Stock signals — well under 1 ms per ticker, so run inline rather than
+        # queue behind news fetches on the shared I/O pool
+        signals = analyzer.analyse_batch(frames)
+        stock_signals = [signals[t] for t in TRACKED_STOCKS]
+        analyzer.save_state()
 
         # 4. Format messages (split to avoid 4096-char Telegram limit)
         messages = formatter.build_report(indices, stock_signals, headlines)
@@ -84,14 +141,13 @@ async def build_and_send_report(bot: Bot):
                 parse_mode="Markdown",
                 disable_web_page_preview=True,
             )
-            await asyncio.sleep(0.5)   # stay well within rate limits
 
-        health.record_success()
+        await health.record_success_async()
         logger.info("✅ Daily report sent successfully.")
 
     except Exception as exc:
         logger.exception("❌ Report build failed: %s", exc)
-        health.record_failure(str(exc))
+        await health.record_failure_async(str(exc))
         await bot.send_message(
             chat_id=CHAT_ID,
             text=f"⚠️ *StockBot Error*\n`{exc}`\nCheck server logs.",
@@ -104,32 +160,38 @@ async def build_and_send_report(bot: Bot):
 # ──────────────────────────────────────────────
 
 async def scheduled_report(context: ContextTypes.DEFAULT_TYPE):
-    await build_and_send_report(context.bot)
+    await build_and_send_report(context.bot, context.application.bot_data["services"])
 
 
 # ──────────────────────────────────────────────
 # Command handlers
 # ──────────────────────────────────────────────
 
+# Replies that depend only on import-time config — rendered once
+_CURRENT_MODE = "Scheduler-Only" if SCHEDULER_ONLY else "Full Polling"
+
+_START_MSG = (
+    "👋 *StockBot is live!*\n\n"
+    "Commands:\n"
+    "/report — Instant full report\n"
+    "/signal TICKER — Signal for one stock\n"
+    "/watchlist — Show tracked stocks\n"
+    "/status — Bot health status\n"
+    "/switch — Toggle polling/scheduler mode\n"
+    "/help — This message\n\n"
+    f"🔄 Current mode: **{_CURRENT_MODE}**"
+)
+
+_WATCHLIST_MSG = "📋 *Tracked Stocks*\n\n" + "\n".join(f"• `{s}`" for s in TRACKED_STOCKS)
+
+
 async def cmd_start(update, context: ContextTypes.DEFAULT_TYPE):
-    current_mode = "Scheduler-Only" if SCHEDULER_ONLY else "Full Polling"
-    await update.message.reply_text(
-        "👋 *StockBot is live!*\n\n"
-        "Commands:\n"
-        "/report — Instant full report\n"
-        "/signal TICKER — Signal for one stock\n"
-        "/watchlist — Show tracked stocks\n"
-        "/status — Bot health status\n"
-        "/switch — Toggle polling/scheduler mode\n"
-        "/help — This message\n\n"
-        f"🔄 Current mode: **{current_mode}**",
-        parse_mode="Markdown",
-    )
+    await update.message.reply_text(_START_MSG, parse_mode="Markdown")
 
 
 async def cmd_report(update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text("⏳ Fetching data, please wait...")
-    await build_and_send_report(context.bot)
+    await build_and_send_report(context.bot, context.application.bot_data["services"])
 
 
 async def cmd_signal(update, context: ContextTypes.DEFAULT_TYPE):
@@ -138,24 +200,19 @@ async def cmd_signal(update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("Usage: /signal NATCOPHARM")
         return
     ticker = args[0].upper()
-    fetcher  = MarketDataFetcher()
-    analyzer = TechnicalAnalyzer()
-    formatter = MessageFormatter()
-    data   = await fetcher.get_ohlcv(ticker)
-    signal = analyzer.analyse(ticker, data)
-    msg    = formatter.format_single_signal(signal)
+    services = context.application.bot_data["services"]
+    data   = await services["fetcher"].get_ohlcv(ticker)
+    signal = services["analyzer"].analyse(ticker, data)
+    msg    = services["formatter"].format_single_signal(signal)
     await update.message.reply_text(msg, parse_mode="Markdown")
 
 
 async def cmd_watchlist(update, context: ContextTypes.DEFAULT_TYPE):
-    stocks = "\n".join(f"• `{s}`" for s in TRACKED_STOCKS)
-    await update.message.reply_text(
-        f"📋 *Tracked Stocks*\n\n{stocks}", parse_mode="Markdown"
-    )
+    await update.message.reply_text(_WATCHLIST_MSG, parse_mode="Markdown")
 
 
 async def cmd_status(update, context: ContextTypes.DEFAULT_TYPE):
-    health = HealthMonitor()
+    health = context.application.bot_data["services"]["health"]
     status = health.get_status()
     await update.message.reply_text(status, parse_mode="Markdown")
 
@@ -169,9 +226,8 @@ async def cmd_switch(update, context: ContextTypes.DEFAULT_TYPE):
     
     args = context.args
     if not args:
-        current_mode = "Scheduler-Only" if SCHEDULER_ONLY else "Full Polling"
         await update.message.reply_text(
-            f"🔄 Current mode: **{current_mode}**\n\n"
+            f"🔄 Current mode: **{_CURRENT_MODE}**\n\n"
             "Usage: `/switch polling` or `/switch scheduler`",
             parse_mode="Markdown"
         )
@@ -205,9 +261,29 @@ async def cmd_switch(update, context: ContextTypes.DEFAULT_TYPE):
 # App entry point
 # ──────────────────────────────────────────────
 
+async def _post_init(app: Application):
+    app.bot_data["executor"] = install_io_executor()
+
+
+async def _post_shutdown(app: Application):
+    await close_services(app.bot_data["services"])
+    # Also called when initialize() failed, in which case post_init never ran
+    executor = app.bot_data.get("executor")
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
 def _build_app() -> Application:
     """Build application with handlers and daily job."""
-    app = Application.builder().token(TELEGRAM_TOKEN).build()
+    app = (
+        Application.builder()
+        .token(TELEGRAM_TOKEN)
+        .rate_limiter(build_rate_limiter())
+        .post_init(_post_init)
+        .post_shutdown(_post_shutdown)
+        .build()
+    )
+    app.bot_data["services"] = build_services()
 
     app.add_handler(CommandHandler("start",     cmd_start))
     app.add_handler(CommandHandler("help",      cmd_start))
@@ -240,16 +316,28 @@ async def _run_scheduler_only():
     """Run only the daily job (no polling). Use when another instance handles commands."""
     app = _build_app()
     await app.initialize()
+    # post_init/post_shutdown only fire under run_polling; asyncio.run()
+    # shuts the default executor down on exit
+    install_io_executor()
     await app.start()
     logger.info("✅ Scheduler-only mode: daily report will run at 09:00 IST. No polling.")
+
+    # Sleep until SIGTERM/SIGINT — the JobQueue wakes up for the daily job
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:   # Windows: Ctrl+C still raises KeyboardInterrupt
+            pass
     try:
-        while True:
-            await asyncio.sleep(3600)
+        await stop.wait()
     except asyncio.CancelledError:
         pass
     finally:
         await app.stop()
         await app.shutdown()
+        await close_services(app.bot_data["services"])
 
 
 def main():
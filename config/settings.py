@@ -55,8 +55,19 @@ INDICES: dict[str, str] = {
     "NIFTY BANK":       "^NSEBANK",
 }
 
+# Broad index whose constituent quotes are fetched in one request per report;
+# tracked stocks outside it fall back to a per-symbol quote
+UNIVERSE_INDEX: str = "NIFTY 500"
+
+# Max concurrent NSE API requests — raise carefully; NSE answers bursts with 429s
+NSE_MAX_CONCURRENCY: int = 5
+# Threads for blocking I/O (RSS parsing, health.json writes)
+IO_THREAD_WORKERS: int = 8
+
 # ── News ──────────────────────────────────────────────────────────────────────
 NEWS_MAX_PER_STOCK: int = 2    # headlines per stock
+NEWS_CACHE_TTL: int     = 60 * 60   # seconds; last good headlines are reused on failure
+NEWS_TIMEOUT: int       = 20        # seconds before falling back to cached headlines
 NEWS_SOURCES: list[str] = [
     "moneycontrol.com",
     "economictimes.indiatimes.com",
@@ -0,0 +1,119 @@
+"""
+Memory + disk TTL cache for market data.
+Entries are pickled to data/cache/ so cron runs (run_report_once.py) can reuse
+data fetched by an earlier process; a dict in front avoids re-reading files.
+"""
+
+import logging
+import os
+import pickle
+import re
+import time
+from datetime import datetime, time as dtime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Optional
+
+CACHE_DIR = "data/cache"
+
+IST          = timezone(timedelta(hours=5, minutes=30))
+MARKET_OPEN  = dtime(9, 15)
+MARKET_CLOSE = dtime(15, 30)
+
+INTRADAY_TTL:  int = 15 * 60        # live quotes move; refresh every 15 min
+OFF_HOURS_TTL: int = 24 * 60 * 60   # nothing changes until the next session
+
+logger = logging.getLogger("Cache")
+
+# key -> (stored_at epoch, session tag, value)
+_memory: dict[str, tuple[float, str, Any]] = {}
+
+
+def market_session(now: Optional[datetime] = None) -> tuple[str, int]:
+    """Return (session tag, ttl seconds) for the current NSE session in IST.
+
+    The tag changes at the open and at the close, so data cached before the
+    bell is never served after it.
+    """
+    now = now or datetime.now(IST)
+    day = now.date().isoformat()
+    if now.weekday() < 5 and MARKET_OPEN <= now.time() < MARKET_CLOSE:
+        return f"{day}:live", INTRADAY_TTL
+    if now.weekday() < 5 and now.time() < MARKET_OPEN:
+        return f"{day}:pre", OFF_HOURS_TTL
+    return f"{day}:closed", OFF_HOURS_TTL
+
+
+def get(key: str, ttl: int, tag: str = "") -> Any:
+    """Return the fresh cached value for `key`, or None (never fetches)."""
+    entry = _memory.get(key) or _read_disk(key)
+    if _is_fresh(entry, ttl, tag):
+        _memory[key] = entry
+        return entry[2]
+    return None
+
+
+async def get_or_fetch(
+    key: str,
+    loader: Callable[[], Awaitable[Any]],
+    ttl: int,
+    tag: str = "",
+    should_cache: Callable[[Any], bool] = lambda value: value is not None,
+    stale_if_error: bool = False,
+) -> Any:
+    """Return the cached value for `key`, or await `loader()` and cache it.
+
+    An entry is fresh when it is younger than `ttl` seconds and was stored
+    under the same `tag`. Results rejected by `should_cache` (e.g. empty
+    frames from a failed fetch) are returned but not stored. With
+    `stale_if_error`, a loader exception or a rejected result falls back to
+    the last stored value, however old, when there is one.
+    """
+    entry = _memory.get(key) or _read_disk(key)
+    if _is_fresh(entry, ttl, tag):
+        _memory[key] = entry
+        return entry[2]
+
+    try:
+        value = await loader()
+    except Exception as e:
+        if stale_if_error and entry is not None:
+            logger.warning("Serving stale %s after fetch error: %r", key, e)
+            return entry[2]
+        raise
+    if should_cache(value):
+        entry = (time.time(), tag, value)
+        _memory[key] = entry
+        _write_disk(key, entry)
+    elif stale_if_error and entry is not None:
+        # Loaders that swallow their own errors signal failure this way
+        logger.warning("Serving stale %s after an unusable fetch result", key)
+        return entry[2]
+    return value
+
+
+def _is_fresh(entry: Optional[tuple[float, str, Any]], ttl: int, tag: str) -> bool:
+    return entry is not None and entry[1] == tag and time.time() - entry[0] < ttl
+
+
+def _path(key: str) -> str:
+    return os.path.join(CACHE_DIR, re.sub(r"[^A-Za-z0-9_.-]", "_", key) + ".pkl")
+
+
+def _read_disk(key: str) -> Optional[tuple[float, str, Any]]:
+    path = _path(key)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except Exception as e:
+        logger.warning("Ignoring unreadable cache file %s: %s", path, e)
+        return None
+
+
+def _write_disk(key: str, entry: tuple[float, str, Any]):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(_path(key), "wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception as e:
+        logger.warning("Cache write failed for %s: %s", key, e)
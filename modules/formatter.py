@@ -11,9 +11,34 @@ from modules.technical import StockSignal
 
 MAX_MSG_LEN = 4000   # safe margin under 4096
 
+_SEP_LIGHT = "─" * 26
+_SEP_HEAVY = "━" * 26
+
+# Report chrome — built once at import; the header only needs the timestamp
+_HEADER_TEMPLATE = (
+    _SEP_HEAVY + "\n"
+    "📊 *DAILY STOCK ALERT REPORT*\n"
+    "🗓 _{now}_\n"
+    + _SEP_HEAVY
+)
+_INDEX_HEADER = "\n📈 *INDEX SUMMARY*\n\n"
+_FOOTER = (
+    "\n" + _SEP_HEAVY + "\n"
+    "⚠️ _For educational purposes only._\n"
+    "_Not SEBI-registered advice._\n"
+    + _SEP_HEAVY
+)
+
 
 class MessageFormatter:
 
+    # (flag, label) -> rendered pill, built once at class creation
+    _PILL = {
+        (flag, label): ("✅ " if flag else "❌ ") + label
+        for flag in (False, True)
+        for label in ("MACD", "EMA20", "EMA50", "Vol↑")
+    }
+
     # ── Public API ────────────────────────────────────────────────────────────
 
     def build_report(
@@ -24,7 +49,8 @@ class MessageFormatter:
     ) -> list[str]:
         """Returns list of Telegram-ready message strings."""
         parts = []
-        parts.append(self._header())
+        now = datetime.now().strftime("%d %b %Y • %I:%M %p IST")
+        parts.append(self._header(now))
         parts.append(self._index_block(indices))
         for sig in signals:
             parts.append(self._signal_block(sig))
@@ -38,30 +64,20 @@ class MessageFormatter:
 
     # ── Private builders ──────────────────────────────────────────────────────
 
-    def _header(self) -> str:
-        now = datetime.now().strftime("%d %b %Y • %I:%M %p IST")
-        return (
-            "━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-            "📊 *DAILY STOCK ALERT REPORT*\n"
-            f"🗓 _{now}_\n"
-            "━━━━━━━━━━━━━━━━━━━━━━━━━━"
-        )
+    def _header(self, now: str) -> str:
+        return _HEADER_TEMPLATE.format(now=now)
 
     def _index_block(self, indices: dict) -> str:
-        lines = ["", "📈 *INDEX SUMMARY*", ""]
-        for name, data in indices.items():
-            if data.get("price") is None:
-                lines.append(f"• {name}: _data unavailable_")
-                continue
-            price      = f"{data['price']:,.2f}"
-            change_pct = data["change_pct"]
-            trend      = data["trend"]
-            emoji      = "🟢" if change_pct >= 0 else "🔴"
-            lines.append(
-                f"{emoji} *{name}*: `{price}` {trend} `{change_pct:+.2f}%`"
-            )
-        lines.append("")
-        return "\n".join(lines)
+        lines = [
+            f"• {name}: _data unavailable_"
+            if d.get("price") is None else
+            f"{'🟢' if d['change_pct'] >= 0 else '🔴'} *{name}*: "
+            f"`{d['price']:,.2f}` {d['trend']} `{d['change_pct']:+.2f}%`"
+            for name, d in indices.items()
+        ]
+        if not lines:
+            return _INDEX_HEADER
+        return _INDEX_HEADER + "\n".join(lines) + "\n"
 
     def _signal_block(self, sig: StockSignal) -> str:
         if sig.error:
@@ -75,15 +91,13 @@ class MessageFormatter:
         vol_str = f"{sig.volume_ratio:.2f}×" if sig.volume_ratio else "—"
 
         # Indicator pill row
-        def pill(flag: bool, label: str) -> str:
-            return f"✅ {label}" if flag else f"❌ {label}"
-
-        indicators = "  ".join([
-            pill(sig.macd_bullish, "MACD"),
-            pill(sig.above_ema20,  "EMA20"),
-            pill(sig.above_ema50,  "EMA50"),
-            pill(sig.volume_spike, "Vol↑"),
-        ])
+        pill = self._PILL
+        indicators = (
+            f"{pill[bool(sig.macd_bullish), 'MACD']}  "
+            f"{pill[bool(sig.above_ema20), 'EMA20']}  "
+            f"{pill[bool(sig.above_ema50), 'EMA50']}  "
+            f"{pill[bool(sig.volume_spike), 'Vol↑']}"
+        )
 
         # Notes
         notes_str = ""
@@ -91,7 +105,7 @@ class MessageFormatter:
             notes_str = "\n💬 " + "\n💬 ".join(sig.notes)
 
         block = (
-            f"\n{'─'*26}\n"
+            f"\n{_SEP_LIGHT}\n"
             f"{sig.signal_emoji} *{sig.ticker}* — {sig.overall_signal}\n"
             f"💰 CMP: `₹{sig.cmp:,}` ({chg_str})\n"
             f"📐 Pattern: _{sig.pattern}_\n"
@@ -124,26 +138,28 @@ class MessageFormatter:
         return "\n".join(lines) + "\n"
 
     def _footer(self) -> str:
-        return (
-            "\n━━━━━━━━━━━━━━━━━━━━━━━━━━\n"
-            "⚠️ _For educational purposes only._\n"
-            "_Not SEBI-registered advice._\n"
-            "━━━━━━━━━━━━━━━━━━━━━━━━━━"
-        )
+        return _FOOTER
 
     # ── Chunker ───────────────────────────────────────────────────────────────
 
     def _chunk(self, parts: list[str]) -> list[str]:
-        """Combine parts into messages ≤ MAX_MSG_LEN chars."""
-        messages = []
-        current  = ""
-        for part in parts:
-            if len(current) + len(part) + 1 > MAX_MSG_LEN:
-                if current:
-                    messages.append(current.strip())
-                current = part
+        """Combine parts into messages ≤ MAX_MSG_LEN chars.
+
+        Boundaries are found from part lengths alone; each message is then
+        joined exactly once.
+        """
+        bounds = []        # (start, end) slices of `parts`
+        start, size = 0, 0  # size == len("\n".join(parts[start:i]))
+        for i, n in enumerate(map(len, parts)):
+            if size + n + 1 > MAX_MSG_LEN:
+                if i > start:
+                    bounds.append((start, i))
+                start, size = i, n
             else:
-                current += ("\n" if current else "") + part
-        if current.strip():
-            messages.append(current.strip())
+                size += n + (1 if i > start else 0)
+
+        messages = ["\n".join(parts[a:b]).strip() for a, b in bounds]
+        last = "\n".join(parts[start:]).strip()
+        if last:
+            messages.append(last)
         return messages if messages else ["No data to display."]
@@ -3,26 +3,64 @@ Simple health monitor — tracks last run status, errors, and uptime.
 Persists state to data/health.json.
 """
 
+import asyncio
 import json
 import logging
 import os
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional, Union
+
+try:
+    import orjson
+except ImportError:   # optional speed-up; falls back to stdlib json
+    orjson = None
 
 HEALTH_FILE = "data/health.json"
 logger = logging.getLogger("Health")
 
 
+def _loads(raw: bytes) -> dict:
+    return orjson.loads(raw) if orjson else json.loads(raw)
+
+
+def _dumps(state: dict) -> bytes:
+    if orjson:
+        return orjson.dumps(state)
+    return json.dumps(state, separators=(",", ":")).encode()
+
+
+def _display_time(ts: Union[int, str, None]) -> Optional[str]:
+    """Render a stored epoch as UTC ISO-8601. Older health.json files stored
+    ISO strings directly; those are passed through unchanged."""
+    if isinstance(ts, (int, float)):
+        return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+    return ts
+
+
 class HealthMonitor:
+    """Process-wide singleton: health.json is read once, then kept in memory."""
+
+    _instance: Optional["HealthMonitor"] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
 
     def __init__(self):
+        if hasattr(self, "_state"):
+            return
         os.makedirs("data", exist_ok=True)
+        self._write_lock = threading.Lock()
         self._state = self._load()
 
     def _load(self) -> dict:
         if os.path.exists(HEALTH_FILE):
             try:
-                with open(HEALTH_FILE) as f:
-                    return json.load(f)
+                with open(HEALTH_FILE, "rb") as f:
+                    return _loads(f.read())
             except Exception:
                 pass
         return {
@@ -32,36 +70,62 @@ class HealthMonitor:
             "last_run":       None,
             "last_status":    "Never run",
             "last_error":     None,
-            "start_time":     datetime.utcnow().isoformat(),
+            "start_time":     int(time.time()),
         }
 
     def _save(self):
-        with open(HEALTH_FILE, "w") as f:
-            json.dump(self._state, f, indent=2)
+        self._write(self._dump())
 
-    def record_success(self):
+    def _dump(self) -> bytes:
+        return _dumps(self._state)
+
+    def _write(self, payload: bytes):
+        # Write-then-rename so a concurrent reader never sees a partial file
+        with self._write_lock:
+            tmp = HEALTH_FILE + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(payload)
+            os.replace(tmp, HEALTH_FILE)
+
+    def _mark_success(self):
         self._state["total_runs"]  += 1
         self._state["successes"]   += 1
-        self._state["last_run"]    = datetime.utcnow().isoformat()
+        self._state["last_run"]    = int(time.time())
         self._state["last_status"] = "✅ Success"
         self._state["last_error"]  = None
-        self._save()
 
-    def record_failure(self, error: str):
+    def _mark_failure(self, error: str):
         self._state["total_runs"] += 1
         self._state["failures"]   += 1
-        self._state["last_run"]   = datetime.utcnow().isoformat()
+        self._state["last_run"]   = int(time.time())
         self._state["last_status"] = "❌ Failed"
         self._state["last_error"]  = error
+
+    def record_success(self):
+        self._mark_success()
         self._save()
 
+    def record_failure(self, error: str):
+        self._mark_failure(error)
+        self._save()
+
+    async def record_success_async(self):
+        """Like record_success, but writes health.json off the event loop."""
+        self._mark_success()
+        await asyncio.to_thread(self._write, self._dump())
+
+    async def record_failure_async(self, error: str):
+        """Like record_failure, but writes health.json off the event loop."""
+        self._mark_failure(error)
+        await asyncio.to_thread(self._write, self._dump())
+
     def get_status(self) -> str:
         s = self._state
-        uptime_since = s.get("start_time", "—")
+        uptime_since = _display_time(s.get("start_time")) or "—"
         return (
             "🤖 *StockBot Health Status*\n\n"
             f"🟢 Last Status:  `{s['last_status']}`\n"
-            f"📅 Last Run:     `{s['last_run'] or 'Never'}`\n"
+            f"📅 Last Run:     `{_display_time(s['last_run']) or 'Never'}`\n"
             f"✅ Successes:    `{s['successes']}`\n"
             f"❌ Failures:     `{s['failures']}`\n"
             f"🔄 Total Runs:   `{s['total_runs']}`\n"
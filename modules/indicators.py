@@ -0,0 +1,215 @@
+"""
+Indicator kernel.
+One pass over a close-price array yields RSI (Wilder), MACD/signal and two EMAs.
+The running averages live in a small state vector, so a series can be resumed
+bar by bar instead of recomputed. Uses numba's JIT when installed, plain
+Python/NumPy otherwise.
+Batch seeding uses scipy's lfilter when scipy is installed.
+"""
+
+import math
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:   # optional speed-up; the loop is cheap for LOOKBACK_DAYS bars
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+# State vector layout
+EMA_S, EMA_L, EMA_F, EMA_SL, MACD_SIG, AVG_GAIN, AVG_LOSS, LAST = range(8)
+STATE_SIZE = 8
+
+
+@njit(cache=True)
+def init_state(first_close: float) -> np.ndarray:
+    """State after the first bar: EMAs at the close, signal at 0, RSI unseeded."""
+    state = np.empty(STATE_SIZE, dtype=np.float64)
+    state[EMA_S] = first_close
+    state[EMA_L] = first_close
+    state[EMA_F] = first_close
+    state[EMA_SL] = first_close
+    state[MACD_SIG] = 0.0
+    state[AVG_GAIN] = math.nan
+    state[AVG_LOSS] = math.nan
+    state[LAST] = first_close
+    return state
+
+
+@njit(cache=True)
+def advance(state: np.ndarray, close: np.ndarray, ema_s: int, ema_l: int, mf: int, ms: int, msig: int, rsi_len: int):
+    """Fold the bars in `close` into `state` (in place).
+
+    Recurrences match pandas `ewm(adjust=False)`; the Wilder averages are
+    seeded with the first price change.
+    """
+    _fold(
+        state, close,
+        2.0 / (ema_s + 1), 2.0 / (ema_l + 1), 2.0 / (mf + 1),
+        2.0 / (ms + 1), 2.0 / (msig + 1), 1.0 / rsi_len,
+    )
+
+
+@njit(cache=True)
+def _fold(state, close, a_s, a_l, a_f, a_sl, a_sig, a_rsi):
+    """advance() given the smoothing factors instead of the periods."""
+    e_s = state[EMA_S]
+    e_l = state[EMA_L]
+    e_f = state[EMA_F]
+    e_sl = state[EMA_SL]
+    sig = state[MACD_SIG]
+    avg_gain = state[AVG_GAIN]
+    avg_loss = state[AVG_LOSS]
+    x = state[LAST]
+
+    for i in range(close.shape[0]):
+        prev = x
+        x = float(close[i])   # float32 input: do all arithmetic in float64
+        e_s += a_s * (x - e_s)
+        e_l += a_l * (x - e_l)
+        e_f += a_f * (x - e_f)
+        e_sl += a_sl * (x - e_sl)
+        sig += a_sig * ((e_f - e_sl) - sig)
+
+        delta = x - prev
+        gain = delta if delta > 0.0 else 0.0
+        loss = -delta if delta < 0.0 else 0.0
+        if math.isnan(avg_gain):
+            avg_gain = gain
+            avg_loss = loss
+        else:
+            avg_gain += a_rsi * (gain - avg_gain)
+            avg_loss += a_rsi * (loss - avg_loss)
+
+    state[EMA_S] = e_s
+    state[EMA_L] = e_l
+    state[EMA_F] = e_f
+    state[EMA_SL] = e_sl
+    state[MACD_SIG] = sig
+    state[AVG_GAIN] = avg_gain
+    state[AVG_LOSS] = avg_loss
+    state[LAST] = x
+
+
+@njit(cache=True)
+def readout(state: np.ndarray):
+    """(rsi, macd, macd_signal, ema_s, ema_l) for the last folded bar.
+
+    RSI is NaN when there are no losses (or fewer than 2 bars).
+    """
+    avg_loss = state[AVG_LOSS]
+    if avg_loss > 0.0:
+        rsi = 100.0 - 100.0 / (1.0 + state[AVG_GAIN] / avg_loss)
+    else:
+        rsi = math.nan
+    return rsi, state[EMA_F] - state[EMA_SL], state[MACD_SIG], state[EMA_S], state[EMA_L]
+
+
+@njit(cache=True)
+def compute(close: np.ndarray, ema_s: int, ema_l: int, mf: int, ms: int, msig: int, rsi_len: int):
+    """Last-bar (rsi, macd, macd_signal, ema_s, ema_l) for the whole of `close`."""
+    state = init_state(close[0])
+    advance(state, close[1:], ema_s, ema_l, mf, ms, msig, rsi_len)
+    return readout(state)
+
+
+def seed_batch(close: np.ndarray, ema_s: int, ema_l: int, mf: int, ms: int, msig: int, rsi_len: int) -> np.ndarray:
+    """State vectors for many equal-length series at once.
+
+    `close` is (T, N) with one series per column; returns (STATE_SIZE, N),
+    column j equal to init_state + advance over close[:, j]. Each bar is one
+    broadcast step across all columns instead of N separate loops, or with
+    scipy, one compiled IIR filter pass per average.
+    """
+    a_s = 2.0 / (ema_s + 1)
+    a_l = 2.0 / (ema_l + 1)
+    a_f = 2.0 / (mf + 1)
+    a_sl = 2.0 / (ms + 1)
+    a_sig = 2.0 / (msig + 1)
+    a_rsi = 1.0 / rsi_len
+
+    try:
+        from scipy.signal import lfilter   # deferred: scipy.signal takes ~1 s to import
+    except ImportError:   # optional: fall back to a per-bar NumPy loop
+        pass
+    else:
+        return _seed_batch_lfilter(lfilter, close.astype(np.float64), a_s, a_l, a_f, a_sl, a_sig, a_rsi)
+
+    state = np.empty((STATE_SIZE, close.shape[1]), dtype=np.float64)
+    state[[EMA_S, EMA_L, EMA_F, EMA_SL, LAST]] = close[0]
+    state[MACD_SIG] = 0.0
+    state[[AVG_GAIN, AVG_LOSS]] = np.nan
+    # Row views: the four price EMAs (and the two Wilder averages) sit in
+    # adjacent rows, so each bar updates them in one fused broadcast
+    emas = state[EMA_S:EMA_SL + 1]
+    e_f, e_sl, sig = state[EMA_F], state[EMA_SL], state[MACD_SIG]
+    wilder = state[AVG_GAIN:AVG_LOSS + 1]
+    ema_alphas = np.array([a_s, a_l, a_f, a_sl])[:, np.newaxis]
+    signs = np.array([1.0, -1.0])[:, np.newaxis]   # gain, loss
+
+    x = state[LAST].copy()
+    for i in range(1, close.shape[0]):
+        prev = x
+        x = close[i].astype(np.float64)
+        emas += ema_alphas * (x - emas)
+        sig += a_sig * ((e_f - e_sl) - sig)
+
+        moves = np.maximum(signs * (x - prev), 0.0)
+        if i == 1:
+            wilder[:] = moves
+        else:
+            wilder += a_rsi * (moves - wilder)
+
+    state[LAST] = x
+    return state
+
+
+def _ema_filter(lfilter, x: np.ndarray, alpha: float, first: np.ndarray) -> np.ndarray:
+    """EMA down axis 0 as the IIR filter y[n] = a*x[n] + (1-a)*y[n-1], with
+    y[0] = first (first = x[0] reproduces ewm(adjust=False))."""
+    zi = ((1.0 - alpha) * first)[np.newaxis, :]
+    return lfilter([alpha], [1.0, alpha - 1.0], x, axis=0, zi=zi)[0]
+
+
+def _seed_batch_lfilter(lfilter, close, a_s, a_l, a_f, a_sl, a_sig, a_rsi) -> np.ndarray:
+    state = np.empty((STATE_SIZE, close.shape[1]), dtype=np.float64)
+    first = close[0]
+    state[EMA_S] = _ema_filter(lfilter, close, a_s, first)[-1]
+    state[EMA_L] = _ema_filter(lfilter, close, a_l, first)[-1]
+    ema_f = _ema_filter(lfilter, close, a_f, first)
+    ema_sl = _ema_filter(lfilter, close, a_sl, first)
+    state[EMA_F] = ema_f[-1]
+    state[EMA_SL] = ema_sl[-1]
+    macd = ema_f - ema_sl   # macd[0] == 0, so a zero seed matches the signal's start
+    state[MACD_SIG] = _ema_filter(lfilter, macd, a_sig, np.zeros_like(first))[-1]
+
+    delta = np.diff(close, axis=0)
+    gain = np.maximum(delta, 0.0)
+    loss = np.maximum(-delta, 0.0)
+    state[AVG_GAIN] = _ema_filter(lfilter, gain, a_rsi, gain[0])[-1]
+    state[AVG_LOSS] = _ema_filter(lfilter, loss, a_rsi, loss[0])[-1]
+    state[LAST] = close[-1]
+    return state
+
+
+def specialize(ema_s: int, ema_l: int, mf: int, ms: int, msig: int, rsi_len: int):
+    """advance(state, close) with these periods baked in.
+
+    Under numba the smoothing factors compile as constants instead of being
+    recomputed and passed on every call.
+    """
+    a_s = 2.0 / (ema_s + 1)
+    a_l = 2.0 / (ema_l + 1)
+    a_f = 2.0 / (mf + 1)
+    a_sl = 2.0 / (ms + 1)
+    a_sig = 2.0 / (msig + 1)
+    a_rsi = 1.0 / rsi_len
+
+    @njit(cache=True)
+    def advance_fixed(state, close):
+        _fold(state, close, a_s, a_l, a_f, a_sl, a_sig, a_rsi)
+
+    return advance_fixed
@@ -3,13 +3,24 @@ Market data fetcher — NSE only (OpenChart).
 Fetches OHLCV and index data from NSE India; no Yahoo/API key.
 """
 
+from __future__ import annotations
+
 import asyncio
 import logging
+from typing import TYPE_CHECKING, Optional, Union
+
+from config.settings import INDICES, NSE_MAX_CONCURRENCY, UNIVERSE_INDEX
+from modules import cache
+from modules.nse_data import NSEDataFetcher, NSEQuote
 
-import pandas as pd
+if TYPE_CHECKING:
+    import pandas as pd
 
-from config.settings import INDICES
-from modules.nse_data import NSEDataFetcher
+# What get_ohlcv() may return. The NSE fetcher only yields single-bar live
+# quotes (NSEQuote); the DataFrame member is kept for a future daily-history
+# feed. No current source produces one, so the indicator kernel path in
+# TechnicalAnalyzer (30+ bars) is not reached today.
+PriceData = Union[NSEQuote, "pd.DataFrame", None]
 
 logger = logging.getLogger("MarketData")
 
@@ -17,26 +28,83 @@ logger = logging.getLogger("MarketData")
 class MarketDataFetcher:
     def __init__(self):
         self.nse_fetcher = NSEDataFetcher()
+        # Caps in-flight NSE requests so concurrent fetches don't trip 429s
+        self._sem = asyncio.Semaphore(NSE_MAX_CONCURRENCY)
+
+    async def get_ohlcv(self, symbol: str) -> PriceData:
+        """Return price data for `symbol`: an NSEQuote, or None when unavailable."""
+        tag, ttl = cache.market_session()
+        return await cache.get_or_fetch(
+            f"ohlcv:{symbol}",
+            lambda: self._fetch_ohlcv(symbol),
+            ttl=ttl,
+            tag=tag,
+        )
+
+    async def get_ohlcv_many(self, symbols: list[str]) -> dict[str, PriceData]:
+        """Return {symbol: price data} for all `symbols` in one call.
 
-    async def get_ohlcv(self, symbol: str) -> pd.DataFrame:
-        """Return OHLCV DataFrame for `symbol` over LOOKBACK_DAYS."""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self.nse_fetcher.get_stock_data, symbol)
+        A symbol whose fetch fails maps to None. When more than
+        one symbol misses the cache, a single UNIVERSE_INDEX snapshot is loaded
+        first so they are served without one request each.
+        """
+        tag, ttl = cache.market_session()
+        misses = [s for s in symbols if cache.get(f"ohlcv:{s}", ttl, tag) is None]
+        if len(misses) > 1:
+            async with self._sem:
+                await self.nse_fetcher.prefetch_universe(UNIVERSE_INDEX)
+
+        quotes = await asyncio.gather(
+            *(self.get_ohlcv(s) for s in symbols), return_exceptions=True
+        )
+        results = {}
+        for symbol, data in zip(symbols, quotes):
+            if isinstance(data, Exception):
+                logger.error("OHLCV fetch failed for %s: %s", symbol, data)
+                data = None
+            results[symbol] = data
+        return results
 
     async def get_index_summary(self) -> dict:
         """Return {index_name: {price, change_pct, trend}} for all tracked indices."""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self._fetch_indices)
+        tag, ttl = cache.market_session()
+        return await cache.get_or_fetch(
+            "indices",
+            self._fetch_indices,
+            ttl=ttl,
+            tag=tag,
+            # Partial results would stick for the rest of the session (24 h
+            # off-hours), so only a complete set is cached
+            should_cache=lambda res: all(d.get("price") is not None for d in res.values()),
+        )
 
-    def _fetch_indices(self) -> dict:
-        results = {}
-        for name, yf_ticker in INDICES.items():
-            try:
-                nse_data = self.nse_fetcher.get_index_data(name, yf_ticker)
-                results[name] = nse_data
-                if nse_data.get("price") is not None:
-                    logger.info("✅ Got index data from NSE for %s", name)
-            except Exception as e:
-                logger.error("NSE index failed for %s: %s", name, e)
-                results[name] = {"price": None, "change_pct": None, "trend": "—"}
+    async def aclose(self):
+        """Release the underlying NSE HTTP connections."""
+        await self.nse_fetcher.aclose()
+
+    async def _fetch_ohlcv(self, symbol: str) -> Optional[NSEQuote]:
+        async with self._sem:
+            return await self.nse_fetcher.get_stock_data(symbol)
+
+    async def _fetch_indices(self) -> dict:
+        # One allIndices request covers every tracked index ...
+        async with self._sem:
+            all_indices = await self.nse_fetcher.get_all_indices()
+        results = {name: all_indices.get(name) for name in INDICES}
+
+        # ... anything it missed is fetched from its own endpoint, concurrently
+        missing = [name for name, data in results.items() if not data or data.get("price") is None]
+        if missing:
+            fallbacks = await asyncio.gather(
+                *(self._fetch_index(name, INDICES[name]) for name in missing)
+            )
+            results.update(zip(missing, fallbacks))
+
+        for name, data in results.items():
+            if data.get("price") is not None:
+                logger.info("✅ Got index data from NSE for %s", name)
         return results
+
+    async def _fetch_index(self, name: str, yf_ticker: str) -> dict:
+        async with self._sem:
+            return await self.nse_fetcher.get_index_data(name, yf_ticker)
@@ -14,7 +14,8 @@ from urllib.parse import quote_plus
 import feedparser
 import httpx
 
-from config.settings import NEWS_MAX_PER_STOCK
+from config.settings import NEWS_CACHE_TTL, NEWS_MAX_PER_STOCK, NEWS_TIMEOUT
+from modules import cache
 
 logger = logging.getLogger("News")
 
@@ -35,12 +36,13 @@ class NewsFetcher:
         """
         Returns {ticker: [{title, url, published}]} for each ticker.
         """
-        loop = asyncio.get_event_loop()
-        tasks = [
-            loop.run_in_executor(None, self._fetch_for_ticker, ticker)
-            for ticker in tickers
-        ]
-        results_list = await asyncio.gather(*tasks, return_exceptions=True)
+        # Download with a real timeout: feedparser.parse(url) has none, and a
+        # hung feed would pin an executor thread long after NEWS_TIMEOUT
+        async with httpx.AsyncClient(timeout=NEWS_TIMEOUT, follow_redirects=True) as client:
+            results_list = await asyncio.gather(
+                *(self._fetch_for_ticker(client, ticker) for ticker in tickers),
+                return_exceptions=True,
+            )
         results = {}
         for ticker, res in zip(tickers, results_list):
             if isinstance(res, Exception):
@@ -50,10 +52,27 @@ class NewsFetcher:
                 results[ticker] = res
         return results
 
-    def _fetch_for_ticker(self, ticker: str) -> list[dict]:
+    async def get_headlines_cached(self, tickers: list[str]) -> dict[str, list[dict]]:
+        """
+        get_headlines() behind a NEWS_CACHE_TTL cache. If the live fetch fails,
+        returns no headlines at all, or exceeds NEWS_TIMEOUT, the last good
+        headlines are served instead.
+        """
+        return await cache.get_or_fetch(
+            "news:" + ",".join(tickers),
+            lambda: asyncio.wait_for(self.get_headlines(tickers), NEWS_TIMEOUT),
+            ttl=NEWS_CACHE_TTL,
+            should_cache=lambda headlines: any(headlines.values()),
+            stale_if_error=True,
+        )
+
+    async def _fetch_for_ticker(self, client: httpx.AsyncClient, ticker: str) -> list[dict]:
         url = GOOGLE_NEWS_RSS.format(query=quote_plus(ticker))
         try:
-            feed    = feedparser.parse(url)
+            resp = await client.get(url)
+            resp.raise_for_status()
+            loop    = asyncio.get_running_loop()
+            feed    = await loop.run_in_executor(None, feedparser.parse, resp.content)
             entries = feed.get("entries", [])
             cutoff  = datetime.utcnow() - timedelta(days=2)
             items   = []
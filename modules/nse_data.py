@@ -3,101 +3,287 @@ NSE data via direct API calls — historical OHLCV and index data.
 Uses NSE's public APIs without external dependencies.
 """
 
+from __future__ import annotations
+
+import asyncio
+import json
 import logging
-import requests
-import pandas as pd
-from datetime import datetime, timedelta
-from typing import Any
+import threading
+import time
+from typing import Any, NamedTuple, Optional
+
+import httpx
 
 from config.settings import LOOKBACK_DAYS
 
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:   # optional speed-up; stdlib json is fine
+    _json_loads = json.loads
+
 logger = logging.getLogger("NSEData")
 
+NSE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'application/json, text/plain, */*',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+
+NSE_HOME = "https://www.nseindia.com"   # sets the session cookies the APIs expect
+QUOTE_URL = "https://www.nseindia.com/api/quote-equity?symbol={symbol}"
+
+# Map index names to NSE API endpoints
+INDEX_URLS = {
+    "NIFTY 50": "https://www.nseindia.com/api/equity-stockIndices?index=NIFTY%2050",
+    "NIFTY BANK": "https://www.nseindia.com/api/equity-stockIndices?index=NIFTY%20BANK",
+    "NIFTY MIDCAP 150": "https://www.nseindia.com/api/equity-stockIndices?index=NIFTY%20MIDCAP%20150",
+    "NIFTY SMALLCAP 250": "https://www.nseindia.com/api/equity-stockIndices?index=NIFTY%20SMALLCAP%20250"
+}
+
+# Constituent quotes (lastPrice, previousClose, totalTradedVolume) for a whole index
+UNIVERSE_URL = "https://www.nseindia.com/api/equity-stockIndices"
+SNAPSHOT_MAX_AGE = 60   # seconds a universe snapshot may stand in for quote-equity
+
+# Every NSE index in a single payload (last + previousClose per index)
+ALL_INDICES_URL = "https://www.nseindia.com/api/allIndices"
+
+NO_INDEX_DATA = {"price": None, "change_pct": None, "trend": "—"}
+
+
+class NSEQuote(NamedTuple):
+    """Synthetic single-bar OHLCV from a live quote (open = previous close)."""
+    open:   float
+    high:   float
+    low:    float
+    close:  float
+    volume: float
+    ts:     float   # epoch seconds when the quote was built
+
+
+# One client (connection pool + cookie jar) per process, shared by every fetcher
+_client: Optional[httpx.AsyncClient] = None
+_client_lock = threading.Lock()
+_warmup: Optional[asyncio.Task] = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Lazily create the shared async client; one connection pool for all NSE calls.
+
+    HTTP/2 lets stock and index requests share a single warm connection
+    to www.nseindia.com; the transport retries failed connects twice.
+    """
+    global _client, _warmup
+    with _client_lock:
+        if _client is None or _client.is_closed:
+            transport = httpx.AsyncHTTPTransport(
+                http2=True,
+                retries=2,
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+            )
+            _client = httpx.AsyncClient(
+                headers=NSE_HEADERS,
+                timeout=10,
+                transport=transport,
+            )
+            _warmup = None
+        return _client
+
+
+async def _warm_client() -> httpx.AsyncClient:
+    """The shared client, after one homepage GET has set NSE's cookies.
+
+    Concurrent first callers all wait on the same warm-up request.
+    """
+    global _warmup
+    client = _get_client()
+    if _warmup is None:
+        _warmup = asyncio.ensure_future(_fetch_cookies(client))
+    await asyncio.shield(_warmup)
+    return client
+
+
+async def _fetch_cookies(client: httpx.AsyncClient):
+    """GET the homepage for cookies; on failure, let the next call warm up again."""
+    global _warmup
+    try:
+        resp = await client.get(NSE_HOME)
+        if resp.status_code != 200:
+            raise httpx.HTTPStatusError(
+                f"status {resp.status_code}", request=resp.request, response=resp,
+            )
+    except Exception as e:   # APIs may still answer; let them report errors
+        logger.warning(f"NSE cookie warm-up failed: {e}")
+        with _client_lock:
+            if _client is client:
+                _warmup = None
+
+
+async def aclose_client():
+    """Close the shared client (call on application shutdown)."""
+    global _client, _warmup
+    with _client_lock:
+        client, _client, _warmup = _client, None, None
+    if client is not None:
+        await client.aclose()
+
+
 class NSEDataFetcher:
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept': 'application/json, text/plain, */*',
-            'Accept-Language': 'en-US,en;q=0.9',
-        })
-
-    def get_stock_data(self, symbol: str) -> pd.DataFrame:
-        """Get current stock data and create synthetic OHLCV"""
+        self._snapshot: dict[str, dict] = {}
+        self._snapshot_at = 0.0
+
+    # ── HTTP client ───────────────────────────────────────────────────────────
+
+    async def aclose(self):
+        """Close the shared async client (call on application shutdown)."""
+        await aclose_client()
+
+    # ── Stocks ────────────────────────────────────────────────────────────────
+
+    async def get_stock_data(self, symbol: str) -> Optional[NSEQuote]:
+        """Get current stock data as a synthetic OHLCV quote (None on failure).
+
+        Served from the universe snapshot when one was loaded recently;
+        falls back to a per-symbol quote-equity request otherwise.
+        """
+        row = self._snapshot.get(symbol)
+        if row is not None and time.monotonic() - self._snapshot_at < SNAPSHOT_MAX_AGE:
+            quote = self._quote(
+                symbol,
+                row.get('lastPrice', 0),
+                row.get('previousClose', 0),
+                row.get('totalTradedVolume', 0),
+            )
+            if quote is not None:
+                return quote
         try:
-            # Get current price data
-            url = f"https://www.nseindia.com/api/quote-equity?symbol={symbol}"
-            response = self.session.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if 'priceInfo' in data:
-                    price_info = data['priceInfo']
-                    current_price = price_info.get('lastPrice', 0)
-                    previous_close = price_info.get('previousClose', 0)
-                    volume = price_info.get('totalTradedVolume', 0)
-                    
-                    if current_price > 0:
-                        # Create realistic OHLCV data
-                        high = max(current_price, previous_close) * 1.01
-                        low = min(current_price, previous_close) * 0.99
-                        
-                        df = pd.DataFrame({
-                            'Open': [previous_close],
-                            'High': [high],
-                            'Low': [low],
-                            'Close': [current_price],
-                            'Volume': [volume]
-                        }, index=[pd.Timestamp.now()])
-                        
-                        logger.info(f"✅ Got NSE data for {symbol}: ₹{current_price}")
-                        return df
-            
-            logger.warning(f"❌ No NSE data for {symbol}")
-            return pd.DataFrame()
-            
+            client = await _warm_client()
+            response = await client.get(QUOTE_URL.format(symbol=symbol))
+            return self._parse_stock_quote(symbol, response)
         except Exception as e:
             logger.error(f"NSE API failed for {symbol}: {e}")
-            return pd.DataFrame()
+            return None
+
+    async def prefetch_universe(self, index: str = "NIFTY 500") -> int:
+        """Snapshot quotes for every constituent of `index` in one request.
+
+        Subsequent get_stock_data calls (within SNAPSHOT_MAX_AGE) read
+        from it instead of hitting quote-equity per symbol. Returns the number
+        of symbols loaded (0 on failure; callers then fall back per symbol).
+        """
+        try:
+            client = await _warm_client()
+            response = await client.get(UNIVERSE_URL, params={"index": index})
+            if response.status_code != 200:
+                logger.warning(f"❌ {index} snapshot returned HTTP {response.status_code}")
+                return 0
+            rows = _json_loads(response.content).get('data', [])
+            self._snapshot = {row['symbol']: row for row in rows if 'symbol' in row}
+            self._snapshot_at = time.monotonic()
+            logger.info(f"✅ Loaded {index} snapshot: {len(self._snapshot)} symbols")
+            return len(self._snapshot)
+        except Exception as e:
+            logger.error(f"NSE {index} snapshot failed: {e}")
+            return 0
+
+    @classmethod
+    def _parse_stock_quote(cls, symbol: str, response) -> Optional[NSEQuote]:
+        if response.status_code == 200:
+            data = response.json()
+            if 'priceInfo' in data:
+                price_info = data['priceInfo']
+                quote = cls._quote(
+                    symbol,
+                    price_info.get('lastPrice', 0),
+                    price_info.get('previousClose', 0),
+                    price_info.get('totalTradedVolume', 0),
+                )
+                if quote is not None:
+                    return quote
+
+        logger.warning(f"❌ No NSE data for {symbol}")
+        return None
+
+    @staticmethod
+    def _quote(symbol: str, current_price: float, previous_close: float, volume: float) -> Optional[NSEQuote]:
+        """Synthetic OHLCV bar from a live quote."""
+        if not current_price or current_price <= 0:
+            return None
 
-    def get_index_data(self, index_display_name: str, yf_ticker: str) -> dict[str, Any]:
+        # Create realistic OHLCV data
+        high = max(current_price, previous_close) * 1.01
+        low = min(current_price, previous_close) * 0.99
+
+        logger.info(f"✅ Got NSE data for {symbol}: ₹{current_price}")
+        return NSEQuote(previous_close, high, low, current_price, volume, time.time())
+
+    # ── Indices ───────────────────────────────────────────────────────────────
+
+    async def get_index_data(self, index_display_name: str, yf_ticker: str) -> dict[str, Any]:
         """Get index data using NSE's public API"""
         try:
-            # Map index names to NSE API endpoints
-            index_urls = {
-                "NIFTY 50": "https://www.nseindia.com/api/equity-stockIndices?index=NIFTY%2050",
-                "NIFTY BANK": "https://www.nseindia.com/api/equity-stockIndices?index=NIFTY%20BANK",
-                "NIFTY MIDCAP 150": "https://www.nseindia.com/api/equity-stockIndices?index=NIFTY%20MIDCAP%20150",
-                "NIFTY SMALLCAP 250": "https://www.nseindia.com/api/equity-stockIndices?index=NIFTY%20SMALLCAP%20250"
-            }
-            
-            url = index_urls.get(index_display_name)
+            url = INDEX_URLS.get(index_display_name)
             if not url:
                 logger.warning(f"No NSE URL for index: {index_display_name}")
-                return {"price": None, "change_pct": None, "trend": "—"}
-            
-            response = self.session.get(url, timeout=10)
-            
-            if response.status_code == 200:
-                data = response.json()
-                if 'data' in data and len(data['data']) > 0:
-                    index_data = data['data'][0]
-                    current_price = index_data.get('lastPrice', 0)
-                    previous_price = index_data.get('previousClose', 0)
-                    
-                    if previous_price > 0:
-                        change_pct = ((current_price - previous_price) / previous_price) * 100
-                        result = {
-                            "price": round(current_price, 2),
-                            "change_pct": round(change_pct, 2),
-                            "trend": "▲" if change_pct >= 0 else "▼"
-                        }
-                        logger.info(f"✅ Got NSE index data for {index_display_name}: ₹{current_price} ({change_pct:+.2f}%)")
-                        return result
-            
-            logger.warning(f"❌ No NSE index data for {index_display_name}")
-            return {"price": None, "change_pct": None, "trend": "—"}
-            
+                return dict(NO_INDEX_DATA)
+
+            client = await _warm_client()
+            response = await client.get(url)
+            return self._parse_index(index_display_name, response)
+
         except Exception as e:
             logger.error(f"NSE index API failed for {index_display_name}: {e}")
-            return {"price": None, "change_pct": None, "trend": "—"}
+            return dict(NO_INDEX_DATA)
+
+    async def get_all_indices(self) -> dict[str, dict[str, Any]]:
+        """Summaries for every NSE index from one allIndices request.
+
+        Returns {index name or indexSymbol: {price, change_pct, trend}};
+        empty on failure.
+        """
+        try:
+            client = await _warm_client()
+            response = await client.get(ALL_INDICES_URL)
+            if response.status_code != 200:
+                logger.warning(f"❌ allIndices returned HTTP {response.status_code}")
+                return {}
+            rows = _json_loads(response.content).get('data', [])
+            result = {}
+            for row in rows:
+                summary = self._index_summary(row.get('last', 0), row.get('previousClose', 0))
+                # Look-ups work by display name ("NIFTY 50") or by indexSymbol
+                for key in (row.get('index'), row.get('indexSymbol')):
+                    if key:
+                        result.setdefault(key, summary)
+            return result
+        except Exception as e:
+            logger.error(f"NSE allIndices API failed: {e}")
+            return {}
+
+    @classmethod
+    def _parse_index(cls, index_display_name: str, response) -> dict[str, Any]:
+        if response.status_code == 200:
+            data = response.json()
+            if 'data' in data and len(data['data']) > 0:
+                index_data = data['data'][0]
+                current_price = index_data.get('lastPrice', 0)
+                result = cls._index_summary(current_price, index_data.get('previousClose', 0))
+                if result["price"] is not None:
+                    logger.info(f"✅ Got NSE index data for {index_display_name}: ₹{current_price} ({result['change_pct']:+.2f}%)")
+                    return result
+
+        logger.warning(f"❌ No NSE index data for {index_display_name}")
+        return dict(NO_INDEX_DATA)
+
+    @staticmethod
+    def _index_summary(current_price: float, previous_price: float) -> dict[str, Any]:
+        """{price, change_pct, trend} from last and previous close — plain floats."""
+        if not previous_price or previous_price <= 0:
+            return dict(NO_INDEX_DATA)
+        change_pct = ((current_price - previous_price) / previous_price) * 100
+        return {
+            "price": round(current_price, 2),
+            "change_pct": round(change_pct, 2),
+            "trend": "▲" if change_pct >= 0 else "▼"
+        }
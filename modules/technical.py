@@ -1,15 +1,22 @@
 """
 Technical analysis engine.
 Computes RSI, MACD, EMAs, volume signals, and pattern labels.
-Uses pandas/numpy only (no pandas-ta/numba) for broad Python compatibility.
+Indicators come from the one-pass kernel in modules.indicators (numba-compiled
+when available, plain NumPy otherwise). Per-ticker kernel state is kept in
+data/indicator_state.pkl so a new bar costs one step, not a full recompute.
+The kernel needs 30+ bars of OHLCV history, which only a future history
+feed would supply; live NSE quotes take the single-bar path.
 """
 
+from __future__ import annotations
+
 import logging
+import os
+import pickle
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import TYPE_CHECKING, Optional, Union
 
 import numpy as np
-import pandas as pd
 
 from config.settings import (
     EMA_SHORT,
@@ -22,34 +29,28 @@ from config.settings import (
     RSI_OVERSOLD,
     VOLUME_SPIKE_MULTIPLIER,
 )
+from modules import indicators
+from modules.nse_data import NSEQuote
 
-logger = logging.getLogger("Technical")
-
+if TYPE_CHECKING:   # pandas is only needed for annotations here
+    import pandas as pd
 
-def _ema(series: pd.Series, length: int) -> pd.Series:
-    """Exponential moving average."""
-    return series.ewm(span=length, adjust=False).mean()
-
-
-def _rsi(series: pd.Series, length: int = 14) -> pd.Series:
-    """RSI (Wilder smoothing)."""
-    delta = series.diff()
-    gain = delta.clip(lower=0)
-    loss = (-delta).clip(lower=0)
-    avg_gain = gain.ewm(alpha=1 / length, adjust=False).mean()
-    avg_loss = loss.ewm(alpha=1 / length, adjust=False).mean()
-    rs = avg_gain / avg_loss.replace(0, np.nan)
-    return 100 - (100 / (1 + rs))
+STATE_FILE = "data/indicator_state.pkl"
+RSI_LENGTH = 14
+_KERNEL_PARAMS = (EMA_SHORT, EMA_LONG, MACD_FAST, MACD_SLOW, MACD_SIGNAL, RSI_LENGTH)
+_advance = indicators.specialize(*_KERNEL_PARAMS)   # periods compiled in as constants
 
+logger = logging.getLogger("Technical")
 
-def _macd(close: pd.Series, fast: int, slow: int, signal: int) -> tuple[pd.Series, pd.Series, pd.Series]:
-    """MACD line, signal line, histogram. Returns (macd_line, signal_line, histogram)."""
-    ema_fast = _ema(close, fast)
-    ema_slow = _ema(close, slow)
-    macd_line = ema_fast - ema_slow
-    signal_line = _ema(macd_line, signal)
-    hist = macd_line - signal_line
-    return macd_line, signal_line, hist
+# Bullish-condition count (0–5) -> (overall_signal, emoji)
+_SIGNAL_TABLE = (
+    ("CAUTION",    "🔴"),
+    ("NEUTRAL",    "⚪"),
+    ("WATCH",      "🟡"),
+    ("BUY",        "🟢"),
+    ("STRONG BUY", "🟢"),
+    ("STRONG BUY", "🟢"),
+)
 
 
 @dataclass
@@ -122,7 +123,117 @@ TRADE_LEVELS: dict = {
 
 class TechnicalAnalyzer:
 
-    def analyse(self, ticker: str, df: pd.DataFrame) -> StockSignal:
+    def __init__(self):
+        # ticker -> {ts, close, state}: kernel state folded up to the bar at `ts`
+        self._state: dict[str, dict] = self._load_state()
+        self._dirty = False   # _state changed since the last save_state()
+
+    # ── Indicator state ───────────────────────────────────────────────────────
+
+    @staticmethod
+    def _load_state() -> dict[str, dict]:
+        if not os.path.exists(STATE_FILE):
+            return {}
+        try:
+            with open(STATE_FILE, "rb") as f:
+                saved = pickle.load(f)
+        except Exception as e:
+            logger.warning("Ignoring unreadable %s: %s", STATE_FILE, e)
+            return {}
+        # State folded with other periods is useless after a settings change
+        if saved.get("params") != _KERNEL_PARAMS:
+            return {}
+        return saved["tickers"]
+
+    def save_state(self):
+        """Persist per-ticker indicator state for the next process.
+
+        A no-op when nothing has been stored since the last save.
+        """
+        if not self._dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
+            # Write-then-rename so a crash mid-write never leaves a torn file
+            tmp = STATE_FILE + ".tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(
+                    {"params": _KERNEL_PARAMS, "tickers": self._state},
+                    f, protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(tmp, STATE_FILE)
+            self._dirty = False
+        except Exception as e:
+            logger.warning("Indicator state write failed: %s", e)
+
+    def _resume_position(self, ticker: str, index: pd.Index, close: np.ndarray) -> int:
+        """Position in `index` of the bar the stored state was folded up to,
+        or -1 when there is no usable state (missing, or that bar's close changed)."""
+        entry = self._state.get(ticker)
+        if entry is None or not index.is_unique:
+            return -1
+        pos = index.get_indexer([entry["ts"]])[0]
+        if 0 <= pos < len(close) - 1 and close[pos] == entry["close"]:
+            return pos
+        return -1
+
+    def _store_state(self, ticker: str, index: pd.Index, close: np.ndarray, state: np.ndarray):
+        self._state[ticker] = {"ts": index[-2], "close": float(close[-2]), "state": state.copy()}
+        self._dirty = True
+
+    def _indicators(self, ticker: str, index: pd.Index, close: np.ndarray) -> tuple:
+        """Last-bar (rsi, macd, macd_signal, ema20, ema50).
+
+        Resumes from the stored state when its bar is still in `index` with
+        the same close, folding only the bars since; otherwise seeds from the
+        start of `close`. The last bar may be a live quote, so state is stored
+        as of the bar before it and the last bar is applied to a copy.
+        """
+        pos = self._resume_position(ticker, index, close)
+        if pos >= 0:
+            state = self._state[ticker]["state"].copy()
+        else:
+            pos = 0
+            state = indicators.init_state(close[0])
+        _advance(state, close[pos + 1:-1])
+
+        self._store_state(ticker, index, close, state)
+        _advance(state, close[-1:])
+        return indicators.readout(state)
+
+    def _seed_states(self, frames: dict) -> None:
+        """Seed state for every multi-bar frame without usable state.
+
+        Frames of equal length are column-stacked and folded together by
+        indicators.seed_batch, so analyse() then only applies the last bar.
+        """
+        groups: dict[int, list] = {}
+        for ticker, df in frames.items():
+            if df is None or isinstance(df, NSEQuote) or len(df) < 30:
+                continue
+            close = np.ascontiguousarray(df["Close"].to_numpy(np.float64), dtype=np.float32)
+            if self._resume_position(ticker, df.index, close) < 0:
+                groups.setdefault(len(close), []).append((ticker, df.index, close))
+
+        for members in groups.values():
+            close_mat = np.column_stack([close[:-1] for _, _, close in members])
+            states = indicators.seed_batch(close_mat, *_KERNEL_PARAMS)
+            for col, (ticker, index, close) in enumerate(members):
+                self._store_state(ticker, index, close, states[:, col])
+
+    # ── Analysis ──────────────────────────────────────────────────────────────
+
+    def analyse_batch(self, frames: dict) -> dict[str, StockSignal]:
+        """analyse() every {ticker: price data}, seeding indicators in one batch."""
+        self._seed_states(frames)
+        return {ticker: self.analyse(ticker, df) for ticker, df in frames.items()}
+
+    def analyse(self, ticker: str, df: Union[pd.DataFrame, NSEQuote, None], force: bool = False) -> StockSignal:
+        """Signal for `ticker` from its OHLCV frame or live quote.
+
+        A TRADE_LEVELS ticker with under 30 bars is marked WATCH on its
+        analyst levels without further work, unless `force` is set.
+        """
         sig = StockSignal(ticker=ticker)
 
         # Pull saved trade levels
@@ -134,61 +245,73 @@ class TechnicalAnalyzer:
         sig.rr_ratio   = lvl.get("rr",    "—")
         sig.pattern    = lvl.get("pattern","—")
 
-        if df.empty or len(df) < 1:
+        if df is None or (not isinstance(df, NSEQuote) and df.empty):
             sig.error = "Insufficient data"
             sig.overall_signal = "NO DATA"
             sig.signal_emoji   = "❓"
             return sig
 
-        try:
-            # Handle both single-row and multi-row DataFrames
-            if len(df) == 1:
-                close = df["Close"]
-                volume = df["Volume"]
+        if isinstance(df, NSEQuote):
+            # A single live quote: price only, no history for indicators
+            sig.cmp = round(float(df.close), 2)
+            sig.notes.append("Limited data: Only current price available")
+            if lvl and not force:
+                sig.overall_signal = "WATCH"
+                sig.signal_emoji   = "🟡"
             else:
-                close = df["Close"]
-                volume = df["Volume"]
+                sig.overall_signal = "NEUTRAL"
+                sig.signal_emoji   = "⚪"
+            return sig
+
+        try:
+            close_arr = df["Close"].to_numpy(np.float64)
+            volume = df["Volume"].to_numpy(np.float64)
+            n_bars = len(close_arr)
 
             # ── Price action ──────────────────────────────────────────────────
-            sig.cmp = round(float(close.iloc[-1]), 2)
-            
+            last_close = float(close_arr[-1])
+            sig.cmp = round(last_close, 2)
+
             # Only calculate change percentage if we have at least 2 data points
-            if len(close) >= 2:
-                sig.change_pct = round(
-                    float((close.iloc[-1] - close.iloc[-2]) / close.iloc[-2] * 100), 2
-                )
+            if n_bars >= 2:
+                prev_close = float(close_arr[-2])
+                sig.change_pct = round((last_close - prev_close) / prev_close * 100, 2)
+
+            # Analyst-levelled ticker without enough history: its levels stand
+            # in for the indicators, so skip straight to WATCH
+            if n_bars < 30 and lvl and not force:
+                sig.notes.append("Limited data: Only current price available")
+                sig.overall_signal = "WATCH"
+                sig.signal_emoji   = "🟡"
+                return sig
 
             # ── Technical indicators (only if we have enough data) ─────────────
-            if len(close) >= 30:  # Only calculate indicators with sufficient data
+            if n_bars >= 30:  # Only calculate indicators with sufficient data
+                # float32 halves the bytes the kernel streams; its
+                # accumulators (and the state vector) stay float64
+                close32 = np.ascontiguousarray(close_arr, dtype=np.float32)
+                rsi, macd, macd_signal, ema20, ema50 = self._indicators(
+                    ticker, df.index, close32,
+                )
+                # Compare in the kernel's input precision
+                last_close32 = float(close32[-1])
+
                 # ── RSI ───────────────────────────────────────────────────────
-                rsi_series = _rsi(close, length=14)
-                if rsi_series is not None and not rsi_series.empty:
-                    last_rsi = rsi_series.iloc[-1]
-                    if np.isfinite(last_rsi):
-                        sig.rsi = round(float(last_rsi), 1)
+                if np.isfinite(rsi):
+                    sig.rsi = round(float(rsi), 1)
 
                 # ── MACD ──────────────────────────────────────────────────────
-                macd_line, signal_line, _ = _macd(
-                    close, fast=MACD_FAST, slow=MACD_SLOW, signal=MACD_SIGNAL
-                )
-                if macd_line is not None and len(macd_line) > 0:
-                    m = float(macd_line.iloc[-1])
-                    s = float(signal_line.iloc[-1])
-                    if np.isfinite(m) and np.isfinite(s):
-                        sig.macd_bullish = bool(m > s)
+                if np.isfinite(macd) and np.isfinite(macd_signal):
+                    sig.macd_bullish = bool(macd > macd_signal)
 
                 # ── EMAs ──────────────────────────────────────────────────────
-                ema20 = _ema(close, EMA_SHORT)
-                ema50 = _ema(close, EMA_LONG)
-                if ema20 is not None and len(ema20) > 0:
-                    sig.above_ema20 = bool(close.iloc[-1] > ema20.iloc[-1])
-                if ema50 is not None and len(ema50) > 0:
-                    sig.above_ema50 = bool(close.iloc[-1] > ema50.iloc[-1])
+                sig.above_ema20 = bool(last_close32 > ema20)
+                sig.above_ema50 = bool(last_close32 > ema50)
 
                 # ── Volume spike ──────────────────────────────────────────────
                 if len(volume) >= 20:
-                    avg_vol = float(volume.iloc[-20:].mean())
-                    cur_vol = float(volume.iloc[-1])
+                    avg_vol = float(volume[-20:].mean())
+                    cur_vol = float(volume[-1])
                     sig.volume_ratio = round(cur_vol / avg_vol, 2) if avg_vol else None
                     sig.volume_spike = bool(
                         sig.volume_ratio and sig.volume_ratio >= VOLUME_SPIKE_MULTIPLIER
@@ -198,31 +321,16 @@ class TechnicalAnalyzer:
                 sig.notes.append("Limited data: Only current price available")
 
             # ── Composite signal ──────────────────────────────────────────────
-            if len(close) >= 30:
-                # Full technical analysis available
-                bullish_count = sum([
-                    sig.macd_bullish,
-                    sig.above_ema20,
-                    sig.above_ema50,
-                    sig.volume_spike,
-                    sig.rsi is not None and RSI_BULLISH_ZONE <= sig.rsi < RSI_OVERBOUGHT,
-                ])
-
-                if bullish_count >= 4:
-                    sig.overall_signal = "STRONG BUY"
-                    sig.signal_emoji   = "🟢"
-                elif bullish_count == 3:
-                    sig.overall_signal = "BUY"
-                    sig.signal_emoji   = "🟢"
-                elif bullish_count == 2:
-                    sig.overall_signal = "WATCH"
-                    sig.signal_emoji   = "🟡"
-                elif bullish_count == 1:
-                    sig.overall_signal = "NEUTRAL"
-                    sig.signal_emoji   = "⚪"
-                else:
-                    sig.overall_signal = "CAUTION"
-                    sig.signal_emoji   = "🔴"
+            if n_bars >= 30:
+                # Full technical analysis available: one bit per bullish condition
+                mask = (
+                    sig.macd_bullish
+                    | sig.above_ema20 << 1
+                    | sig.above_ema50 << 2
+                    | sig.volume_spike << 3
+                    | (sig.rsi is not None and RSI_BULLISH_ZONE <= sig.rsi < RSI_OVERBOUGHT) << 4
+                )
+                sig.overall_signal, sig.signal_emoji = _SIGNAL_TABLE[bin(mask).count("1")]
             else:
                 # Limited data - base signal on price movement only
                 if sig.change_pct is not None:
@@ -12,14 +12,25 @@ import sys
 os.makedirs("logs", exist_ok=True)
 os.makedirs("data", exist_ok=True)
 
-from telegram import Bot
+from telegram.ext import ExtBot
 from config.settings import TELEGRAM_TOKEN
-from bot import build_and_send_report
+from bot import (
+    build_and_send_report,
+    build_rate_limiter,
+    build_services,
+    close_services,
+    install_io_executor,
+)
 
 
 async def main():
-    bot = Bot(TELEGRAM_TOKEN)
-    await build_and_send_report(bot)
+    install_io_executor()
+    services = build_services()
+    try:
+        async with ExtBot(TELEGRAM_TOKEN, rate_limiter=build_rate_limiter()) as bot:
+            await build_and_send_report(bot, services)
+    finally:
+        await close_services(services)
 
 
 if __name__ == "__main__":
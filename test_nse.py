@@ -3,29 +3,30 @@
 Test NSE data fetching (OpenChart)
 """
 
+import asyncio
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from modules.nse_data import NSEDataFetcher
 
-def test_nse():
+async def test_nse():
     print("🔍 Testing NSE (OpenChart)...")
     fetcher = NSEDataFetcher()
 
     # Index data (pass display name + legacy ticker)
     print("\n📊 Index data:")
     for name, ticker in [("NIFTY 50", "^NSEI"), ("NIFTY BANK", "^NSEBANK")]:
-        data = fetcher.get_index_data(name, ticker)
+        data = await fetcher.get_index_data(name, ticker)
         print(f"  {name}: {data}")
 
     # Stock OHLCV
     print("\n📈 Stock OHLCV:")
     for symbol in ["RELIANCE", "TCS"]:
-        df = fetcher.get_stock_data(symbol)
-        print(f"  {symbol}: {len(df)} rows")
-        if not df.empty:
-            print(df.tail(2).to_string())
+        quote = await fetcher.get_stock_data(symbol)
+        print(f"  {symbol}: {quote if quote is not None else 'no data'}")
+
+    await fetcher.aclose()
 
 if __name__ == "__main__":
-    test_nse()
+    asyncio.run(test_nse())
@@ -17,9 +17,9 @@ logging.basicConfig(
 )
 from config.settings import CHAT_ID, TRACKED_STOCKS, LOG_HTTP
 
-if LOG_HTTP:
-    logging.getLogger("urllib3").setLevel(logging.INFO)
+logging.getLogger("httpx").setLevel(logging.INFO if LOG_HTTP else logging.WARNING)
 from modules.market_data import MarketDataFetcher
+from modules.nse_data import NSEQuote
 from modules.technical import TechnicalAnalyzer
 from config.settings import TELEGRAM_TOKEN
 
@@ -50,10 +50,11 @@ async def main():
     lines.append(f"\n*Stock: {ticker} (NSE)*")
     try:
         df = await fetcher.get_ohlcv(ticker)
-        if df.empty or len(df) < 30:
-            lines.append(f"  ❌ OHLCV: no data or < 30 rows ({len(df)} rows)")
+        rows = 0 if df is None else 1 if isinstance(df, NSEQuote) else len(df)
+        if rows < 30:
+            lines.append(f"  ❌ OHLCV: no data or < 30 rows ({rows} rows)")
         else:
-            lines.append(f"  ✅ OHLCV: {len(df)} rows")
+            lines.append(f"  ✅ OHLCV: {rows} rows")
             sig = analyzer.analyse(ticker, df)
             if sig.error:
                 lines.append(f"  ⚠️ Signal: {sig.error}")